@@ -29,11 +29,22 @@ class DonationData(BaseModel):
     is_donor_anonymous: bool
     campaign_age: int
     donation_id: Optional[str] = None
+    donor_id: Optional[str] = None
+    ip: Optional[str] = None
+    device_id: Optional[str] = None
+    campaign_id: Optional[str] = None
+
+class EntityLookup(BaseModel):
+    donor_id: Optional[str] = None
+    ip: Optional[str] = None
+    device_id: Optional[str] = None
 
 class PredictionResponse(BaseModel):
     donation_id: Optional[str]
     is_fraud: bool
     fraud_score: float
+    fraud_probability: Optional[float] = None
+    fraud_percentile: Optional[float] = None
     explanation: str
 
 app = FastAPI(title="Charity Fraud Detection API", version="1.0.0")
@@ -42,6 +53,14 @@ app = FastAPI(title="Charity Fraud Detection API", version="1.0.0")
 async def startup_event():
     detector.load_model()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Keep the graph built from live donations across restarts
+    if detector.preprocessor is not None:
+        detector.preprocessor.save_entity_graph()
+    if detector.calibrator is not None:
+        detector.calibrator.stop_background_refresh()
+
 @app.get("/")
 async def root():
     return {"message": "Charity Fraud Detection API", "version": "1.0.0"}
@@ -62,6 +81,8 @@ async def predict(donation: DonationData):
             donation_id=donation_data.get('donation_id'),
             is_fraud=prediction_result['is_fraud'],
             fraud_score=prediction_result['fraud_score'],
+            fraud_probability=prediction_result.get('fraud_probability'),
+            fraud_percentile=prediction_result.get('fraud_percentile'),
             explanation=explanation
         )
         
@@ -70,6 +91,40 @@ async def predict(donation: DonationData):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
+@app.get("/calibration")
+async def calibration_status():
+    if detector.calibrator is None:
+        return {"calibrated": False, "thresholds": {}}
+    
+    thresholds = {
+        "|".join(segment) if isinstance(segment, tuple) else segment: value
+        for segment, value in detector.calibrator.thresholds.items()
+    }
+    return {
+        "calibrated": True,
+        "alert_budget": detector.calibrator.alert_budget,
+        "segment_features": detector.calibrator.segment_features,
+        "thresholds": thresholds
+    }
+
+@app.post("/graph/component")
+async def graph_component(entities: EntityLookup):
+    if detector.preprocessor is None and not detector.load_model():
+        raise HTTPException(status_code=500, detail="Model could not be loaded")
+    
+    entity_graph = detector.preprocessor.entity_graph
+    if entity_graph is None:
+        raise HTTPException(status_code=404, detail="Entity graph is disabled")
+    
+    root = entity_graph.lookup(entities.dict())
+    return {"found": root is not None, **entity_graph.component_features(root)}
+
+@app.get("/graph/stats")
+async def graph_stats():
+    if detector.preprocessor is None or detector.preprocessor.entity_graph is None:
+        return {"enabled": False}
+    return {"enabled": True, **detector.preprocessor.entity_graph.stats()}
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "model_loaded": detector.model is not None}
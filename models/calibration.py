@@ -0,0 +1,183 @@
+import numpy as np
+import threading
+from collections import deque
+from sklearn.isotonic import IsotonicRegression
+import joblib
+import yaml
+import os
+import sys
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+# Load configuration
+config_path = os.path.join(project_root, 'config.yaml')
+with open(config_path, 'r') as f:
+    config = yaml.safe_load(f)
+
+GLOBAL_SEGMENT = '__all__'
+
+
+class ScoreSketch:
+    """Sliding window over the most recent live scores.
+
+    Appends are O(1); quantiles are only read from the sorted snapshot
+    taken by ``snapshot()``, so lookups never sort on the request path.
+    """
+
+    def __init__(self, window_size):
+        self.scores = deque(maxlen=window_size)
+        self.sorted_scores = np.empty(0)
+
+    def update(self, score):
+        self.scores.append(float(score))
+
+    def snapshot(self):
+        self.sorted_scores = np.sort(np.array(list(self.scores), dtype=float))
+        return self.sorted_scores
+
+    def quantile(self, q):
+        if len(self.sorted_scores) == 0:
+            return None
+        return float(np.quantile(self.sorted_scores, q))
+
+    def percentile(self, score):
+        n = len(self.sorted_scores)
+        if n == 0:
+            return None
+        return float(np.searchsorted(self.sorted_scores, score, side='right')) / n
+
+    def __len__(self):
+        return len(self.scores)
+
+
+class ScoreCalibrator:
+    def __init__(self):
+        cal_config = config.get('calibration', {})
+        self.window_size = cal_config.get('window_size', 10000)
+        self.alert_budget = cal_config.get('alert_budget', config['data']['fraud_ratio'])
+        self.min_segment_samples = cal_config.get('min_segment_samples', 200)
+        self.refresh_interval = cal_config.get('refresh_interval_seconds', 60)
+        self.segment_features = cal_config.get('segment_features', ['device_type', 'is_donor_anonymous'])
+
+        self.isotonic = None
+        self.sketches = {GLOBAL_SEGMENT: ScoreSketch(self.window_size)}
+        # Swapped as a whole by recompute_thresholds() so readers see either
+        # the old or the new mapping, never a partially updated one
+        self.thresholds = {}
+
+        self._stop_event = None
+        self._refresh_thread = None
+
+    def segment_key(self, row):
+        return tuple(str(row.get(feature)) for feature in self.segment_features)
+
+    def fit(self, scores, labels):
+        scores = np.asarray(scores, dtype=float)
+        labels = np.asarray(labels, dtype=float)
+
+        self.isotonic = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds='clip')
+        self.isotonic.fit(scores, labels)
+        return self
+
+    def seed(self, scores, segments):
+        # Only segments present at training time get their own sketch;
+        # anything seen later is scored against the global one
+        for score, segment in zip(scores, segments):
+            self.update(segment, score, create=True)
+        self.recompute_thresholds()
+
+    def update(self, segment, score, create=False):
+        self.sketches[GLOBAL_SEGMENT].update(score)
+        sketch = self.sketches.get(segment)
+        if sketch is None:
+            if not create:
+                return
+            sketch = self.sketches.setdefault(segment, ScoreSketch(self.window_size))
+        sketch.update(score)
+
+    def recompute_thresholds(self):
+        thresholds = {}
+        for segment, sketch in list(self.sketches.items()):
+            sketch.snapshot()
+            if segment != GLOBAL_SEGMENT and len(sketch.sorted_scores) < self.min_segment_samples:
+                continue
+            threshold = sketch.quantile(1 - self.alert_budget)
+            if threshold is not None:
+                thresholds[segment] = threshold
+        self.thresholds = thresholds
+        return thresholds
+
+    def threshold(self, segment):
+        thresholds = self.thresholds
+        if segment in thresholds:
+            return thresholds[segment]
+        return thresholds.get(GLOBAL_SEGMENT)
+
+    def is_alert(self, segment, score):
+        threshold = self.threshold(segment)
+        if threshold is None:
+            return None
+        return bool(score > threshold)
+
+    def probability(self, score):
+        if self.isotonic is None:
+            return None
+        return float(self.isotonic.predict([score])[0])
+
+    def percentile(self, segment, score):
+        sketch = self.sketches.get(segment)
+        if sketch is None or len(sketch.sorted_scores) < self.min_segment_samples:
+            sketch = self.sketches[GLOBAL_SEGMENT]
+        return sketch.percentile(score)
+
+    def calibrate(self, row, score):
+        segment = self.segment_key(row)
+        result = {
+            'is_fraud': self.is_alert(segment, score),
+            'fraud_probability': self.probability(score),
+            'fraud_percentile': self.percentile(segment, score),
+            'threshold': self.threshold(segment),
+        }
+        self.update(segment, score)
+        return result
+
+    def _refresh_loop(self):
+        while not self._stop_event.wait(self.refresh_interval):
+            try:
+                self.recompute_thresholds()
+            except Exception as e:
+                print(f"Error recomputing thresholds: {e}")
+
+    def start_background_refresh(self):
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._stop_event = threading.Event()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self):
+        if self._stop_event is not None:
+            self._stop_event.set()
+        self._refresh_thread = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_stop_event'] = None
+        state['_refresh_thread'] = None
+        return state
+
+    def save(self, filepath):
+        full_path = os.path.join(project_root, filepath)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        joblib.dump(self, full_path)
+        print(f"Calibrator saved to {full_path}")
+
+    @staticmethod
+    def load(filepath):
+        full_path = os.path.join(project_root, filepath)
+        calibrator = joblib.load(full_path)
+        print(f"Calibrator loaded from {full_path}")
+        return calibrator
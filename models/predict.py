@@ -11,6 +11,7 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from utils.preprocess import DataPreprocessor
+from models.calibration import ScoreCalibrator
 
 # Load configuration
 config_path = os.path.join(project_root, 'config.yaml')
@@ -22,6 +23,21 @@ class FraudDetector:
         self.model = None
         self.preprocessor = None
         self.feature_names = None
+        self.calibrator = None
+        
+    def load_calibrator(self):
+        # load_model() can run more than once, so retire the old refresh thread
+        if self.calibrator is not None:
+            self.calibrator.stop_background_refresh()
+            self.calibrator = None
+        
+        try:
+            self.calibrator = ScoreCalibrator.load(config['paths']['calibrator'])
+            self.calibrator.start_background_refresh()
+        except Exception as e:
+            # Fall back to the model's own decision when no calibrator is available
+            print(f"Calibrator not loaded, using model threshold: {e}")
+            self.calibrator = None
         
     def load_model(self):
         try:
@@ -33,6 +49,7 @@ class FraudDetector:
             self.preprocessor.load_preprocessor(preprocessor_path)
             self.feature_names = self.preprocessor.feature_names
             print("Model and preprocessor loaded successfully")
+            self.load_calibrator()
             return True
         except Exception as e:
             print(f"Error loading model: {e}")
@@ -48,7 +65,9 @@ class FraudDetector:
         else:
             donation_df = donation_data.copy()
         
-        X, _, df_processed = self.preprocessor.preprocess_data(donation_df, fit=False)
+        # Scored donations are linked into the entity graph so later
+        # donations see the rings they form
+        X, _, df_processed = self.preprocessor.preprocess_data(donation_df, fit=False, update_graph=True)
         
         if config['model']['algorithm'] == 'isolation_forest':
             prediction = self.model.predict(X)
@@ -61,11 +80,22 @@ class FraudDetector:
         if config['model']['algorithm'] == 'lof' and len(X) == 1:
             prediction = np.array([1 if fraud_score[0] > 0.5 else -1])
         
-        is_fraud = (prediction == -1)
+        is_fraud = bool(prediction[0] == -1)
+        fraud_probability = None
+        fraud_percentile = None
+        
+        if self.calibrator is not None:
+            calibrated = self.calibrator.calibrate(df_processed.iloc[0], fraud_score[0])
+            if calibrated['is_fraud'] is not None:
+                is_fraud = bool(calibrated['is_fraud'])
+            fraud_probability = calibrated['fraud_probability']
+            fraud_percentile = calibrated['fraud_percentile']
         
         return {
-            'is_fraud': bool(is_fraud[0]),
+            'is_fraud': is_fraud,
             'fraud_score': float(fraud_score[0]),
+            'fraud_probability': fraud_probability,
+            'fraud_percentile': fraud_percentile,
             'processed_data': df_processed.iloc[0].to_dict()
         }
 
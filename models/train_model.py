@@ -3,7 +3,8 @@ import numpy as np
 from sklearn.ensemble import IsolationForest
 from sklearn.neighbors import LocalOutlierFactor
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
+from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score, brier_score_loss
+from sklearn.calibration import calibration_curve
 import joblib
 import yaml
 import os
@@ -15,6 +16,8 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from utils.preprocess import DataPreprocessor
+from utils.entity_graph import EntityGraph
+from models.calibration import ScoreCalibrator
 
 # Load configuration
 config_path = os.path.join(project_root, 'config.yaml')
@@ -31,6 +34,13 @@ def train_model():
     print(f"Dataset shape: {df.shape}")
     
     preprocessor = DataPreprocessor()
+    
+    # Link donors, IPs and devices from the dataset that carries entity ids
+    if preprocessor.entity_graph is not None:
+        graph_data_path = os.path.join(project_root, config['graph']['source_file'])
+        preprocessor.entity_graph = EntityGraph.build(pd.read_csv(graph_data_path))
+        print(f"Entity graph: {preprocessor.entity_graph.stats()}")
+    
     X, y, df_processed = preprocessor.preprocess_data(df, fit=True)
     
     # Save the preprocessor
@@ -38,12 +48,20 @@ def train_model():
     preprocessor.save_preprocessor(preprocessor_path)
     
     # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=config['model']['test_size'], 
+    X_train, X_test, y_train, y_test, df_train, df_test = train_test_split(
+        X, y, df_processed, test_size=config['model']['test_size'], 
         random_state=config['model']['random_state'], stratify=y
     )
     
-    print(f"Training set: {X_train.shape[0]} samples")
+    # Hold back part of the training data for score calibration so the
+    # test set stays clean for evaluating the calibrated probabilities
+    X_fit, X_cal, y_fit, y_cal, df_fit, df_cal = train_test_split(
+        X_train, y_train, df_train, test_size=config['calibration']['calibration_size'],
+        random_state=config['model']['random_state'], stratify=y_train
+    )
+    
+    print(f"Training set: {X_fit.shape[0]} samples")
+    print(f"Calibration set: {X_cal.shape[0]} samples")
     print(f"Test set: {X_test.shape[0]} samples")
     
     # Train the model
@@ -66,12 +84,24 @@ def train_model():
     print("Training model...")
     
     if config['model']['algorithm'] == 'isolation_forest':
-        model.fit(X_train)
+        model.fit(X_fit)
+        cal_scores = -model.decision_function(X_cal)
         y_pred = model.predict(X_test)
         y_pred_binary = np.where(y_pred == -1, 1, 0)
+        test_scores = -model.decision_function(X_test)
     else:
+        model.fit_predict(X_cal)
+        cal_scores = -model.negative_outlier_factor_
         y_pred = model.fit_predict(X_test)
         y_pred_binary = np.where(y_pred == -1, 1, 0)
+        test_scores = -model.negative_outlier_factor_
+    
+    # Calibrate raw scores on the calibration split and seed the
+    # per-segment thresholds with its score distribution
+    print("Calibrating scores...")
+    calibrator = ScoreCalibrator().fit(cal_scores, y_cal)
+    segments = [calibrator.segment_key(row) for _, row in df_cal.iterrows()]
+    calibrator.seed(cal_scores, segments)
     
     # Evaluate
     print("\nModel Evaluation:")
@@ -85,6 +115,14 @@ def train_model():
     except:
         print("Could not calculate ROC AUC")
     
+    # Check the calibrated probabilities on the untouched test set
+    test_probs = calibrator.isotonic.predict(test_scores)
+    print(f"\nCalibration Brier Score: {brier_score_loss(y_test, test_probs):.4f}")
+    frac_fraud, mean_prob = calibration_curve(y_test, test_probs, n_bins=10, strategy='quantile')
+    print("Reliability (mean predicted -> observed fraud rate):")
+    for predicted, observed in zip(mean_prob, frac_fraud):
+        print(f"  {predicted:.3f} -> {observed:.3f}")
+    
     # Save the model
     if config['model']['algorithm'] == 'isolation_forest':
         model_path = os.path.join(project_root, config['paths']['model'])
@@ -92,6 +130,8 @@ def train_model():
         joblib.dump(model, model_path)
         print("Model saved successfully")
     
+    calibrator.save(config['paths']['calibrator'])
+    
     return model, preprocessor
 
 if __name__ == "__main__":
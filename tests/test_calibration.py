@@ -0,0 +1,104 @@
+import pickle
+import numpy as np
+import os
+import sys
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from models.calibration import ScoreCalibrator, GLOBAL_SEGMENT
+
+
+def make_calibrator(min_segment_samples=10):
+    calibrator = ScoreCalibrator()
+    calibrator.min_segment_samples = min_segment_samples
+    calibrator.alert_budget = 0.1
+    return calibrator
+
+
+def test_segment_threshold_and_global_fallback():
+    calibrator = make_calibrator()
+    busy = ('mobile', 'False')
+    sparse = ('tablet', 'True')
+    calibrator.seed(np.arange(100, dtype=float), [busy] * 100)
+    calibrator.seed([500.0] * 5, [sparse] * 5)
+
+    assert busy in calibrator.thresholds
+    assert sparse not in calibrator.thresholds
+    assert calibrator.threshold(busy) == np.quantile(np.arange(100), 0.9)
+    assert calibrator.threshold(sparse) == calibrator.thresholds[GLOBAL_SEGMENT]
+    assert calibrator.is_alert(busy, 95.0) is True
+    assert calibrator.is_alert(busy, 50.0) is False
+
+
+def test_unknown_segments_use_global_sketch():
+    calibrator = make_calibrator()
+    calibrator.seed(np.arange(100, dtype=float), [('mobile', 'False')] * 100)
+
+    for i in range(20):
+        calibrator.calibrate({'device_type': f'spoofed-{i}', 'is_donor_anonymous': False}, 50.0)
+
+    assert set(calibrator.sketches) == {GLOBAL_SEGMENT, ('mobile', 'False')}
+    assert len(calibrator.sketches[GLOBAL_SEGMENT]) == 120
+    assert calibrator.threshold(('spoofed-0', 'False')) == calibrator.thresholds[GLOBAL_SEGMENT]
+
+
+def test_is_alert_none_before_snapshot():
+    calibrator = make_calibrator()
+    for score in range(50):
+        calibrator.update(('desktop', 'False'), float(score), create=True)
+
+    assert calibrator.is_alert(('desktop', 'False'), 100.0) is None
+    assert calibrator.percentile(('desktop', 'False'), 100.0) is None
+
+
+def test_percentile_bounds():
+    calibrator = make_calibrator()
+    segment = ('desktop', 'True')
+    calibrator.seed(np.linspace(0, 1, 50), [segment] * 50)
+
+    assert calibrator.percentile(segment, -1.0) == 0.0
+    assert calibrator.percentile(segment, 2.0) == 1.0
+    assert 0.0 < calibrator.percentile(segment, 0.5) < 1.0
+    # Unknown segments read from the global sketch
+    assert calibrator.percentile(('unknown', 'x'), 2.0) == 1.0
+
+
+def test_probability_is_monotone():
+    calibrator = make_calibrator()
+    assert calibrator.probability(0.0) is None
+
+    scores = np.linspace(-1, 1, 200)
+    calibrator.fit(scores, (scores > 0.5).astype(int))
+    assert calibrator.probability(-1.0) <= calibrator.probability(0.0) <= calibrator.probability(1.0)
+    assert 0.0 <= calibrator.probability(5.0) <= 1.0
+
+
+def test_calibrate_updates_window():
+    calibrator = make_calibrator()
+    row = {'device_type': 'mobile', 'is_donor_anonymous': True}
+    calibrator.seed([0.1], [('mobile', 'True')])
+    result = calibrator.calibrate(row, 0.3)
+
+    assert result['is_fraud'] is not None
+    assert len(calibrator.sketches[('mobile', 'True')]) == 2
+    assert len(calibrator.sketches[GLOBAL_SEGMENT]) == 2
+
+
+def test_pickle_drops_refresh_thread():
+    calibrator = make_calibrator()
+    calibrator.seed(np.arange(20, dtype=float), [('mobile', 'False')] * 20)
+    calibrator.start_background_refresh()
+    try:
+        restored = pickle.loads(pickle.dumps(calibrator))
+    finally:
+        calibrator.stop_background_refresh()
+
+    assert restored._refresh_thread is None
+    assert restored._stop_event is None
+    assert restored.thresholds == calibrator.thresholds
+    restored.start_background_refresh()
+    assert restored._refresh_thread.is_alive()
+    restored.stop_background_refresh()
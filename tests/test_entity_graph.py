@@ -0,0 +1,154 @@
+import pickle
+import numpy as np
+import pandas as pd
+import os
+import sys
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.entity_graph import EntityGraph, GRAPH_FEATURES
+
+
+def donation(donation_id, donor, ip, device, campaign, amount=10.0):
+    return {
+        'donation_id': donation_id, 'donor_id': donor, 'ip': ip,
+        'device_id': device, 'campaign_id': campaign, 'amount': amount
+    }
+
+
+def test_merging_components_with_aggregates():
+    graph = EntityGraph()
+    graph.add_donation(donation('d1', 'alice', '1.1.1.1', 'dev-a', 'c1', 10.0))
+    graph.add_donation(donation('d2', 'bob', '2.2.2.2', 'dev-b', 'c2', 20.0))
+    graph.add_donation(donation('d3', 'bob', '2.2.2.2', 'dev-b', 'c3', 5.0))
+    assert graph.stats()['components'] == 2
+
+    # Carol shares alice's IP and bob's device, joining both rings
+    root = graph.add_donation(donation('d4', 'carol', '1.1.1.1', 'dev-b', 'c1', 1.0))
+    features = graph.component_features(root)
+
+    assert features['ring_size'] == 7
+    assert features['ring_donors'] == 3
+    assert features['ring_donations'] == 4
+    assert features['ring_campaigns'] == 3
+    assert features['ring_total_amount'] == 36.0
+    assert features['ring_donors_per_ip'] == 1.5
+    assert features['ring_donors_per_device'] == 1.5
+
+
+def test_merge_into_component_without_campaigns():
+    graph = EntityGraph()
+    graph.add_donation(donation('d1', 'alice', '1.1.1.1', 'dev-a', None))
+    root = graph.add_donation(donation('d2', 'bob', '1.1.1.1', 'dev-b', 'c1'))
+    assert graph.component_features(root)['ring_campaigns'] == 1
+
+    graph.add_donation(donation('d3', 'carol', '3.3.3.3', 'dev-c', None))
+    root = graph.add_donation(donation('d4', 'carol', '1.1.1.1', 'dev-c', None))
+    assert graph.component_features(root)['ring_campaigns'] == 1
+
+
+def test_campaign_count_is_capped():
+    graph = EntityGraph()
+    graph.max_ring_campaigns = 3
+    for i in range(10):
+        root = graph.add_donation(donation(f'd{i}', f'donor{i}', '1.1.1.1', f'dev{i}', f'c{i}'))
+    assert graph.component_features(root)['ring_campaigns'] == 3
+
+
+def test_repeated_entity_reuses_node():
+    graph = EntityGraph()
+    first = graph.add_donation(donation('d1', 'alice', '1.1.1.1', 'dev-a', 'c1'))
+    second = graph.add_donation(donation('d2', 'alice', '1.1.1.1', 'dev-a', 'c1'))
+
+    assert first == second
+    assert len(graph) == 3
+    features = graph.component_features(second)
+    assert features['ring_donations'] == 2
+    assert features['ring_campaigns'] == 1
+
+
+def test_repeated_donation_id_counted_once():
+    graph = EntityGraph()
+    graph.add_donation(donation('d1', 'alice', '1.1.1.1', 'dev-a', 'c1', 10.0))
+    root = graph.add_donation(donation('d1', 'alice', '1.1.1.1', 'dev-a', 'c1', 10.0))
+
+    features = graph.component_features(root)
+    assert features['ring_donations'] == 1
+    assert features['ring_total_amount'] == 10.0
+
+
+def test_reused_donation_id_with_new_entities_is_linked():
+    graph = EntityGraph()
+    graph.add_donation(donation('214', 'alice', '1.1.1.1', 'dev-a', 'c1', 10.0))
+    root = graph.add_donation(donation('214', 'alice', '1.1.1.1', 'zz', '999', 5.0))
+
+    features = graph.component_features(root)
+    assert features['ring_donations'] == 2
+    assert features['ring_total_amount'] == 15.0
+    assert features['ring_campaigns'] == 2
+    assert graph.lookup({'device_id': 'zz'}) == root
+
+
+def test_build_ids_do_not_shadow_live_donations():
+    df = pd.DataFrame([donation(214, 'alice', '1.1.1.1', 'dev-a', 'c1', 92.65)])
+    graph = EntityGraph.build(df)
+    assert len(graph.seen_donations) == 0
+
+    root = graph.add_donation(donation('214', 'alice', '1.1.1.1', 'dev-a', 'c1', 20.0))
+    assert graph.component_features(root)['ring_donations'] == 2
+
+
+def test_missing_and_nan_entities_are_skipped():
+    graph = EntityGraph()
+    root = graph.add_donation(donation('d1', 'alice', None, np.nan, 'c1'))
+    assert len(graph) == 1
+    assert graph.component_features(root)['ring_size'] == 1
+
+    assert graph.add_donation(donation('d2', None, float('nan'), None, 'c1')) is None
+    assert len(graph) == 1
+
+    # Rows missing the value (NaN from pandas) do not link to anything
+    df = pd.DataFrame([donation('d3', 'bob', None, 'dev-b', 'c2'), donation('d4', 'carol', None, 'dev-c', 'c2')])
+    graph.transform(df)
+    assert graph.stats()['components'] == 3
+
+
+def test_lookup_unknown_entity():
+    graph = EntityGraph()
+    graph.add_donation(donation('d1', 'alice', '1.1.1.1', 'dev-a', 'c1'))
+
+    assert graph.lookup({'ip': '9.9.9.9'}) is None
+    assert graph.lookup({}) is None
+    assert graph.component_features(None)['ring_size'] == 0
+    assert len(graph) == 3
+    assert graph.lookup({'device_id': 'dev-a'}) == graph.lookup({'donor_id': 'alice'})
+
+
+def test_stats_after_merges():
+    graph = EntityGraph()
+    for i in range(4):
+        graph.add_donation(donation(f'd{i}', f'donor{i}', f'ip{i}', f'dev{i}', 'c1'))
+    assert graph.stats() == {'entities': 12, 'components': 4, 'largest_component': 3}
+
+    graph.add_donation(donation('d4', 'donor0', 'ip1', 'dev2', 'c1'))
+    assert graph.stats() == {'entities': 12, 'components': 2, 'largest_component': 9}
+
+
+def test_build_and_transform_columns():
+    df = pd.DataFrame([
+        donation('d1', 'alice', '1.1.1.1', 'dev-a', 'c1'),
+        donation('d2', 'bob', '1.1.1.1', 'dev-b', 'c2'),
+    ])
+    graph = EntityGraph.build(df)
+    assert graph.stats()['components'] == 1
+
+    features = graph.transform(df, update=False)
+    assert list(features.columns) == GRAPH_FEATURES
+    assert features['ring_donors'].tolist() == [2, 2]
+    assert features['ring_donations'].tolist() == [2, 2]
+
+    restored = pickle.loads(pickle.dumps(graph))
+    assert restored.component_features(restored.lookup({'ip': '1.1.1.1'})) == features.iloc[0].to_dict()
@@ -0,0 +1,117 @@
+import numpy as np
+import os
+import sys
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+import models.predict as predict
+from models.calibration import ScoreCalibrator
+
+DONATION = {
+    'amount': 50.0,
+    'donation_time': '2024-01-15 14:30:00',
+    'donor_comment': 'Happy to support this cause!',
+    'donation_frequency_from_ip': 1,
+    'device_type': 'desktop',
+    'geo_distance_from_campaign': 100.5,
+    'is_donor_anonymous': False,
+    'campaign_age': 30
+}
+
+
+class StubPreprocessor:
+    def preprocess_data(self, df, fit=False, update_graph=True):
+        return np.zeros((len(df), 1)), None, df.copy()
+
+
+class StubIsolationForest:
+    def __init__(self, score, prediction):
+        self.score = score
+        self.prediction = prediction
+
+    def predict(self, X):
+        return np.array([self.prediction] * len(X))
+
+    def decision_function(self, X):
+        return np.array([-self.score] * len(X))
+
+
+class StubLOF:
+    def __init__(self, score):
+        self.score = score
+
+    def fit_predict(self, X):
+        self.negative_outlier_factor_ = np.array([-self.score] * len(X))
+        return np.array([1] * len(X))
+
+
+def seeded_calibrator():
+    calibrator = ScoreCalibrator()
+    calibrator.min_segment_samples = 10
+    calibrator.alert_budget = 0.1
+    scores = np.arange(100, dtype=float)
+    calibrator.fit(scores, (scores > 90).astype(int))
+    calibrator.seed(scores, [('desktop', 'False')] * 100)
+    return calibrator
+
+
+def make_detector(model, calibrator):
+    detector = predict.FraudDetector()
+    detector.model = model
+    detector.preprocessor = StubPreprocessor()
+    detector.calibrator = calibrator
+    return detector
+
+
+def test_calibrated_threshold_overrides_model_decision():
+    flagged = make_detector(StubIsolationForest(95.0, 1), seeded_calibrator()).predict(DONATION)
+    assert flagged['is_fraud'] is True
+    assert flagged['fraud_probability'] == 1.0
+    assert flagged['fraud_percentile'] == 0.96
+
+    cleared = make_detector(StubIsolationForest(10.0, -1), seeded_calibrator()).predict(DONATION)
+    assert cleared['is_fraud'] is False
+
+
+def test_calibrated_threshold_replaces_lof_cutoff(monkeypatch):
+    monkeypatch.setitem(predict.config['model'], 'algorithm', 'lof')
+
+    # The fixed cutoff would call a score of 95 legitimate
+    result = make_detector(StubLOF(95.0), seeded_calibrator()).predict(DONATION)
+    assert result['is_fraud'] is True
+
+
+def test_falls_back_to_model_without_thresholds():
+    calibrator = ScoreCalibrator()
+    result = make_detector(StubIsolationForest(10.0, -1), calibrator).predict(DONATION)
+
+    assert result['is_fraud'] is True
+    assert result['fraud_probability'] is None
+    assert result['fraud_percentile'] is None
+
+
+def test_falls_back_to_model_without_calibrator():
+    result = make_detector(StubIsolationForest(95.0, 1), None).predict(DONATION)
+
+    assert result['is_fraud'] is False
+    assert result['fraud_probability'] is None
+
+
+def test_predict_endpoint_returns_calibrated_fields(monkeypatch):
+    monkeypatch.setattr(main.detector, 'model', StubIsolationForest(95.0, 1))
+    monkeypatch.setattr(main.detector, 'preprocessor', StubPreprocessor())
+    monkeypatch.setattr(main.detector, 'calibrator', seeded_calibrator())
+
+    response = TestClient(main.app).post('/predict', json=DONATION)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body['is_fraud'] is True
+    assert body['fraud_probability'] == 1.0
+    assert body['fraud_percentile'] == 0.96
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+import os
+import sys
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import utils.preprocess as preprocess
+from utils.entity_graph import EntityGraph, GRAPH_FEATURES
+
+
+class StubSentimentAnalyzer:
+    def polarity_scores(self, text):
+        return {'compound': 0.0}
+
+
+@pytest.fixture
+def preprocessor(monkeypatch):
+    # The VADER lexicon is not needed for the graph features
+    monkeypatch.setattr(preprocess, 'SentimentIntensityAnalyzer', StubSentimentAnalyzer)
+    data_preprocessor = preprocess.DataPreprocessor()
+    data_preprocessor.entity_graph = EntityGraph()
+    return data_preprocessor
+
+
+def test_graph_features_zero_without_entity_columns(preprocessor):
+    df = pd.DataFrame({'amount': [10.0, 20.0]})
+    result = preprocessor.add_graph_features(df)
+
+    for feature in GRAPH_FEATURES:
+        assert result[feature].tolist() == [0.0, 0.0]
+    assert len(preprocessor.entity_graph) == 0
+
+
+def test_graph_features_zero_when_graph_disabled(preprocessor):
+    preprocessor.entity_graph = None
+    df = pd.DataFrame({'donor_id': ['alice'], 'ip': ['1.1.1.1']})
+    result = preprocessor.add_graph_features(df)
+
+    assert result['ring_size'].tolist() == [0.0]
+
+
+def test_graph_features_with_entity_columns(preprocessor):
+    df = pd.DataFrame({
+        'donation_id': ['d1', 'd2'], 'donor_id': ['alice', 'bob'], 'ip': ['1.1.1.1', '1.1.1.1'],
+        'device_id': ['dev-a', 'dev-b'], 'campaign_id': ['c1', 'c2'], 'amount': [10.0, 20.0]
+    })
+    result = preprocessor.add_graph_features(df)
+
+    assert result['ring_donors'].tolist() == [1, 2]
+    assert result['ring_donations'].tolist() == [1, 2]
+    assert preprocessor.entity_graph.stats()['components'] == 1
+
+
+def test_graph_features_without_update_leave_graph_unchanged(preprocessor):
+    preprocessor.entity_graph.add_donation({'donation_id': 'd1', 'donor_id': 'alice', 'ip': '1.1.1.1'})
+    df = pd.DataFrame({'donation_id': ['d2'], 'donor_id': ['bob'], 'ip': ['1.1.1.1']})
+    result = preprocessor.add_graph_features(df, update_graph=False)
+
+    assert result['ring_donors'].tolist() == [1]
+    assert len(preprocessor.entity_graph) == 2
+    assert preprocessor.entity_graph.lookup({'donor_id': 'bob'}) is None
@@ -0,0 +1,253 @@
+import pandas as pd
+from array import array
+from collections import OrderedDict
+from hashlib import blake2b
+import yaml
+import os
+import sys
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+# Load configuration
+config_path = os.path.join(project_root, 'config.yaml')
+with open(config_path, 'r') as f:
+    config = yaml.safe_load(f)
+
+GRAPH_FEATURES = [
+    'ring_size', 'ring_donations', 'ring_donors', 'ring_campaigns',
+    'ring_total_amount', 'ring_donors_per_ip', 'ring_donors_per_device'
+]
+
+NO_CAMPAIGN = -2 ** 63
+
+
+def entity_key(value):
+    # Stable 64-bit key instead of the raw string; stays the same across
+    # processes so a saved graph keeps resolving the same entities
+    return int.from_bytes(blake2b(str(value).encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+
+def _is_missing(value):
+    return value is None or (not isinstance(value, str) and pd.isna(value))
+
+
+class EntityGraph:
+    """Incremental union-find over donor, IP and device entities.
+
+    Every donation links the entities it mentions, so donors that share an
+    IP or device end up in the same component. Nodes are plain integer ids
+    and per-node state lives in typed arrays indexed by id; aggregates are
+    kept only on component roots and merged on union.
+
+    Memory is roughly 200 bytes per entity: about 130 bytes for the
+    64-bit key in ``node_ids`` and 8 bytes per typed array slot for the
+    rest. Campaigns are stored as a single 64-bit key per root, with a
+    small array (at most ``max_ring_campaigns`` entries) only for
+    components spanning several campaigns, so ``ring_campaigns``
+    saturates at that cap.
+    """
+
+    def __init__(self):
+        graph_config = config.get('graph', {})
+        self.link_columns = graph_config.get('link_columns', ['donor_id', 'ip', 'device_id'])
+        self.campaign_column = graph_config.get('campaign_column', 'campaign_id')
+        self.amount_column = graph_config.get('amount_column', 'amount')
+        self.id_column = graph_config.get('id_column', 'donation_id')
+        self.max_ring_campaigns = graph_config.get('max_ring_campaigns', 64)
+        self.dedupe_window = graph_config.get('dedupe_window', 100000)
+
+        # One id space per entity type so equal values of different types
+        # (e.g. a donor and a device with the same id) stay distinct nodes
+        self.node_ids = {column: {} for column in self.link_columns}
+        self.parent = array('l')
+
+        # Component aggregates, only meaningful at root ids
+        self.size = array('l')
+        self.type_counts = [array('l') for _ in self.link_columns]
+        self.donations = array('l')
+        self.total_amount = array('d')
+        self.campaign = array('q')
+        self.extra_campaigns = {}
+        self.component_count = 0
+        self.largest_component = 0
+
+        # Recently linked (donation id, entities) keys, so retried requests
+        # are not counted twice
+        self.seen_donations = OrderedDict()
+
+    @classmethod
+    def build(cls, df):
+        graph = cls()
+        columns = graph.link_columns + [graph.campaign_column, graph.amount_column, graph.id_column]
+        for donation in df[[column for column in columns if column in df.columns]].to_dict('records'):
+            # Dataset ids live in their own namespace, so they must not
+            # shadow live donations that happen to reuse them
+            graph.add_donation(donation, dedupe=False)
+        return graph
+
+    def __len__(self):
+        return len(self.parent)
+
+    def _add_node(self, type_index):
+        node = len(self.parent)
+        self.parent.append(node)
+        self.size.append(1)
+        for i, counts in enumerate(self.type_counts):
+            counts.append(1 if i == type_index else 0)
+        self.donations.append(0)
+        self.total_amount.append(0.0)
+        self.campaign.append(NO_CAMPAIGN)
+        self.component_count += 1
+        self.largest_component = max(self.largest_component, 1)
+        return node
+
+    def _node(self, type_index, value, create=True):
+        if _is_missing(value):
+            return None
+        ids = self.node_ids[self.link_columns[type_index]]
+        key = entity_key(value)
+        node = ids.get(key)
+        if node is None and create:
+            node = self._add_node(type_index)
+            ids[key] = node
+        return node
+
+    def _campaigns(self, root):
+        extra = self.extra_campaigns.get(root)
+        if extra is not None:
+            return list(extra)
+        if self.campaign[root] != NO_CAMPAIGN:
+            return [self.campaign[root]]
+        return []
+
+    def _set_campaigns(self, root, campaigns):
+        campaigns = sorted(set(campaigns))[:self.max_ring_campaigns]
+        self.campaign[root] = campaigns[0] if campaigns else NO_CAMPAIGN
+        if len(campaigns) > 1:
+            self.extra_campaigns[root] = array('q', campaigns)
+        else:
+            self.extra_campaigns.pop(root, None)
+
+    def find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            # Path halving keeps trees shallow without recursion
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, a, b):
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        self.component_count -= 1
+        self.largest_component = max(self.largest_component, self.size[root_a])
+        for counts in self.type_counts:
+            counts[root_a] += counts[root_b]
+        self.donations[root_a] += self.donations[root_b]
+        self.total_amount[root_a] += self.total_amount[root_b]
+
+        # Both lists are capped, so the merge is bounded per union
+        campaigns_b = self._campaigns(root_b)
+        if campaigns_b:
+            self._set_campaigns(root_a, self._campaigns(root_a) + campaigns_b)
+            self._set_campaigns(root_b, [])
+        return root_a
+
+    def _seen(self, donation):
+        donation_id = donation.get(self.id_column)
+        if _is_missing(donation_id):
+            return False
+        # A reused id that carries different entities is a new donation
+        columns = self.link_columns + [self.campaign_column]
+        key = entity_key('|'.join([str(donation_id)] + [str(donation.get(column)) for column in columns]))
+        if key in self.seen_donations:
+            return True
+        self.seen_donations[key] = None
+        if len(self.seen_donations) > self.dedupe_window:
+            self.seen_donations.popitem(last=False)
+        return False
+
+    def add_donation(self, donation, dedupe=True):
+        if dedupe and self._seen(donation):
+            return self.lookup(donation)
+
+        nodes = []
+        for type_index, column in enumerate(self.link_columns):
+            node = self._node(type_index, donation.get(column))
+            if node is not None:
+                nodes.append(node)
+        if not nodes:
+            return None
+
+        root = self.find(nodes[0])
+        for node in nodes[1:]:
+            root = self.union(root, node)
+
+        self.donations[root] += 1
+        amount = donation.get(self.amount_column)
+        if not _is_missing(amount):
+            self.total_amount[root] += float(amount)
+        campaign = donation.get(self.campaign_column)
+        if not _is_missing(campaign):
+            campaigns = self._campaigns(root)
+            key = entity_key(campaign)
+            if key not in campaigns:
+                self._set_campaigns(root, campaigns + [key])
+        return root
+
+    def lookup(self, donation):
+        for type_index, column in enumerate(self.link_columns):
+            node = self._node(type_index, donation.get(column), create=False)
+            if node is not None:
+                return self.find(node)
+        return None
+
+    def component_features(self, root):
+        if root is None:
+            return {
+                'ring_size': 0, 'ring_donations': 0, 'ring_donors': 0, 'ring_campaigns': 0,
+                'ring_total_amount': 0.0, 'ring_donors_per_ip': 0.0, 'ring_donors_per_device': 0.0
+            }
+
+        counts = {column: self.type_counts[i][root] for i, column in enumerate(self.link_columns)}
+        donors = counts.get('donor_id', 0)
+        ips = counts.get('ip', 0)
+        devices = counts.get('device_id', 0)
+        return {
+            'ring_size': int(self.size[root]),
+            'ring_donations': int(self.donations[root]),
+            'ring_donors': int(donors),
+            'ring_campaigns': len(self._campaigns(root)),
+            'ring_total_amount': float(self.total_amount[root]),
+            'ring_donors_per_ip': donors / ips if ips else 0.0,
+            'ring_donors_per_device': donors / devices if devices else 0.0
+        }
+
+    def has_entity_columns(self, df):
+        return any(column in df.columns for column in self.link_columns)
+
+    def transform(self, df, update=True):
+        # Donations are linked in row order, so each row only sees the
+        # component as it stood once that donation arrived
+        features = []
+        for donation in df.to_dict('records'):
+            root = self.add_donation(donation) if update else self.lookup(donation)
+            features.append(self.component_features(root))
+        return pd.DataFrame(features, index=df.index, columns=GRAPH_FEATURES)
+
+    def stats(self):
+        return {
+            'entities': len(self.parent),
+            'components': self.component_count,
+            'largest_component': int(self.largest_component)
+        }
@@ -30,6 +30,9 @@ def generate_explanation(prediction_result: Dict[str, Any]) -> str:
         if 'sentiment_score' in data and data['sentiment_score'] < -0.5:
             reasons.append("Negative sentiment in comment")
         
+        if data.get('ring_donors', 0) > 3:
+            reasons.append(f"Linked to {data['ring_donors']} donors sharing IPs or devices")
+        
         if len(reasons) == 0:
             reasons.append("Combination of multiple suspicious factors")
         
@@ -15,6 +15,8 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
+from utils.entity_graph import EntityGraph, GRAPH_FEATURES
+
 # Download required NLTK data
 try:
     nltk.data.find('vader_lexicon')
@@ -31,18 +33,32 @@ class DataPreprocessor:
         self.sia = SentimentIntensityAnalyzer()
         self.preprocessor = None
         self.feature_names = None
+        self.entity_graph = EntityGraph() if config.get('graph', {}).get('enabled', False) else None
         
     def extract_sentiment(self, text):
         if not text or pd.isna(text):
             return 0
         return self.sia.polarity_scores(text)['compound']
     
-    def preprocess_data(self, df, fit=False):
+    def add_graph_features(self, df_processed, update_graph=True):
+        # Always emit the ring columns so they can be listed as model
+        # features; rows without donor/IP/device ids get zeros
+        if self.entity_graph is not None and self.entity_graph.has_entity_columns(df_processed):
+            df_processed[GRAPH_FEATURES] = self.entity_graph.transform(df_processed, update=update_graph)
+        else:
+            for feature in GRAPH_FEATURES:
+                df_processed[feature] = 0.0
+        return df_processed
+    
+    def preprocess_data(self, df, fit=False, update_graph=True):
         df_processed = df.copy()
         
         # Extract sentiment from comments
         df_processed['sentiment_score'] = df_processed['donor_comment'].apply(self.extract_sentiment)
         
+        # Component-level ring features from the donor/IP/device link graph
+        df_processed = self.add_graph_features(df_processed, update_graph=update_graph)
+        
         # Prepare features for modeling
         X = df_processed[config['features']['numerical'] + config['features']['categorical']]
         y = df_processed['label'] if 'label' in df_processed.columns else None
@@ -80,12 +96,27 @@ class DataPreprocessor:
             os.makedirs(os.path.dirname(full_path), exist_ok=True)
             joblib.dump(self.preprocessor, full_path)
             print(f"Preprocessor saved to {full_path}")
+        
+        self.save_entity_graph()
+    
+    def save_entity_graph(self):
+        if self.entity_graph is not None:
+            graph_path = os.path.join(project_root, config['paths']['entity_graph'])
+            os.makedirs(os.path.dirname(graph_path), exist_ok=True)
+            joblib.dump(self.entity_graph, graph_path)
+            print(f"Entity graph saved to {graph_path}")
     
     def load_preprocessor(self, filepath):
         full_path = os.path.join(project_root, filepath)
         self.preprocessor = joblib.load(full_path)
         print(f"Preprocessor loaded from {full_path}")
         
+        if self.entity_graph is not None:
+            graph_path = os.path.join(project_root, config['paths']['entity_graph'])
+            if os.path.exists(graph_path):
+                self.entity_graph = joblib.load(graph_path)
+                print(f"Entity graph loaded from {graph_path}")
+        
         # Reconstruct feature names
         numerical_features = config['features']['numerical']
         categorical_features = config['features']['categorical']